@@ -1,24 +1,35 @@
 # Backend/api/auth.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from models.user import UserCreate, User, UserInDB
-from core.security import get_password_hash, verify_password
+from core.security import (
+    hash_password_async,
+    verify_and_update_password_async,
+    CredentialServiceBusy,
+)
 from db.database import get_database
+from core.affinity import set_affinity
+from services.plan_service import plan_for_user
 from pymongo.errors import DuplicateKeyError
 from fastapi import Body
 
 router = APIRouter()
 
 @router.post("/signup", response_model=User)
-async def signup(user: UserCreate, db = Depends(get_database)):
+async def signup(user: UserCreate, response: Response, db = Depends(get_database)):
     user_collection = db.users
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except CredentialServiceBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     user_data = user.dict()
     user_data["hashed_password"] = hashed_password
     user_data["chat_history"] = []
+    user_data["plan"] = plan_for_user(user_data)
     try:
         result = await user_collection.insert_one(user_data)
     except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="User already exists")
+    set_affinity(response, user.email)
     
     created_user = UserInDB(
         id=str(result.inserted_id),
@@ -44,17 +55,25 @@ async def signup(user: UserCreate, db = Depends(get_database)):
     )
 
 @router.post("/login")
-async def login(email: str = Body(...), password: str = Body(...), db = Depends(get_database)):
+async def login(response: Response, email: str = Body(...), password: str = Body(...), db = Depends(get_database)):
     user_collection = db.users
     user_data = await user_collection.find_one({"email": email})
     if not user_data:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    if not verify_password(password, user_data["hashed_password"]):
+    try:
+        valid, new_hash = await verify_and_update_password_async(password, user_data["hashed_password"])
+    except CredentialServiceBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash was made with a different bcrypt cost; upgrade it in place.
+        await user_collection.update_one({"_id": user_data["_id"]}, {"$set": {"hashed_password": new_hash}})
     
     user_data["id"] = str(user_data["_id"])
     if "chat_history" not in user_data:
         user_data["chat_history"] = []
+    set_affinity(response, email)
     
     return {
         "email": user_data["email"],
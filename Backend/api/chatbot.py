@@ -1,14 +1,20 @@
 # Backend/api/chatbot.py
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Response
 from uuid import uuid4
 import shutil
 import os
+import asyncio
+import logging
 from services.llm_gemini_service import process_prompt, process_document
+from core.affinity import set_affinity
 from db.database import get_database
+from core.rate_limit import chat_rate_limiter, upload_rate_limiter, llm_limiter, ingest_limiter
+from core.metrics import IN_FLIGHT, timed
 from models.user import UserInDB
 from pydantic import BaseModel
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class PromptRequest(BaseModel):
     email: str
@@ -16,7 +22,8 @@ class PromptRequest(BaseModel):
 
 async def get_user_by_email(email: str, db):
     user_collection = db.users
-    user_data = await user_collection.find_one({"email": email})
+    with timed("user_fetch"):
+        user_data = await user_collection.find_one({"email": email})
     if not user_data:
         raise HTTPException(status_code=401, detail="User not found")
     user_data["id"] = str(user_data["_id"])
@@ -25,45 +32,63 @@ async def get_user_by_email(email: str, db):
     return UserInDB(**user_data)
 
 @router.post("/prompt")
-async def chatbot_prompt(request: PromptRequest, db = Depends(get_database)):
+async def chatbot_prompt(request: PromptRequest, response: Response, db = Depends(get_database)):
+    set_affinity(response, request.email)
     try:
-        print("[DEBUG] chatbot_prompt: Received prompt:", request.prompt)
         user = await get_user_by_email(request.email, db)
-        print("[DEBUG] chatbot_prompt: Fetched user:", user.email)
 
         if not request.prompt.strip():
-            print("[DEBUG] chatbot_prompt: Empty prompt, returning chat history.")
+            logger.debug("chatbot_prompt: empty prompt from %s, returning chat history", user.email)
             return {"history": user.chat_history or []}
 
-        response = await process_prompt(db, request.prompt, request.email)
-        print("[DEBUG] chatbot_prompt: Received response:", response)
+        chat_rate_limiter.check(request.email)
+        with IN_FLIGHT.labels(operation="chat_prompt").track_inprogress():
+            async with llm_limiter.slot():
+                answer = await process_prompt(db, request.prompt, request.email)
+        logger.debug("chatbot_prompt: response of %d chars for %s", len(answer), user.email)
 
         chat_history = user.chat_history if user.chat_history else []
-        chat_history.append((request.prompt, response))
-        await db.users.update_one(
-            {"email": user.email}, 
-            {"$set": {"chat_history": chat_history}}
-        )
-        print("[DEBUG] chatbot_prompt: Updated chat history for user.")
+        chat_history.append((request.prompt, answer))
+        with timed("history_write"):
+            await db.users.update_one(
+                {"email": user.email}, 
+                {"$set": {"chat_history": chat_history}}
+            )
 
-        return {"result": response}
+        return {"result": answer}
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("chatbot_prompt failed for %s", request.email)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _save_upload(file: UploadFile, filename: str):
+    with open(filename, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
 @router.post("/upload-pdf")
 async def upload_pdf(
+    response: Response,
     file: UploadFile = File(...),
     email: str = Form(...), 
     db = Depends(get_database)
 ):
+    # Only known users get a bucket and stored chunks; otherwise rotating
+    # emails would bypass the per-user limit.
+    await get_user_by_email(email, db)
+    set_affinity(response, email)
+    upload_rate_limiter.check(email)
     try:
-        filename = f"temp_{uuid4().hex}.pdf"
-        with open(filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        await process_document(filename, db, email)
-        os.remove(filename)
+        async with ingest_limiter.slot():
+            with IN_FLIGHT.labels(operation="pdf_ingest").track_inprogress():
+                filename = f"temp_{uuid4().hex}.pdf"
+                await asyncio.to_thread(_save_upload, file, filename)
+                try:
+                    await process_document(filename, db, email)
+                finally:
+                    os.remove(filename)
         return {"detail": "PDF processed successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
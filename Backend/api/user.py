@@ -1,6 +1,8 @@
 # Backend/api/user.py
 from fastapi import APIRouter, HTTPException, Depends
 from db.database import get_database
+from services.plan_service import PLAN_INPUT_FIELDS, get_or_create_plan, plan_for_user
+from services.rag_state import get_rag_store
 from models.user import User
 from typing import Optional
 from pydantic import BaseModel
@@ -35,8 +37,13 @@ async def update_user_details(
     if request_data.risk_tolerance is not None:
         update_fields["risk_tolerance"] = request_data.risk_tolerance
 
+    if any(field in update_fields and update_fields[field] != user_data.get(field) for field in PLAN_INPUT_FIELDS):
+        update_fields["plan"] = plan_for_user({**user_data, **update_fields})
+
     if update_fields:
         await user_collection.update_one({"email": email}, {"$set": update_fields})
+        # Profile data is part of the user's retrieval index; have workers rebuild it.
+        await get_rag_store(db).invalidate(email)
 
     updated_user = await user_collection.find_one({"email": email})
 
@@ -49,4 +56,12 @@ async def update_user_details(
         "investment_goals": updated_user["investment_goals"],
         "risk_tolerance": updated_user["risk_tolerance"],
         "chat_history": updated_user.get("chat_history", []),
+        "plan": await get_or_create_plan(db, updated_user),
     }
+
+@router.get("/plan")
+async def get_user_plan(email: str, db = Depends(get_database)):
+    user_data = await db.users.find_one({"email": email})
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+    return await get_or_create_plan(db, user_data)
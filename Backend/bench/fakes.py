@@ -0,0 +1,189 @@
+# Backend/bench/fakes.py
+"""
+In-process stand-ins for Gemini, the embedding model and MongoDB.
+Importing this module imports the service layer, so core.config must
+already be able to load (see bench.loadtest.configure_environment).
+"""
+import asyncio
+import copy
+import hashlib
+import random
+import re
+import time
+import zlib
+from types import SimpleNamespace
+from typing import List
+import numpy as np
+from bson import ObjectId
+from pydantic import Field
+from pymongo.errors import DuplicateKeyError
+from langchain.embeddings.base import Embeddings
+from services import llm_gemini_service
+from services.llm_gemini_service import GeminiLLM, TimedEmbeddings
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class FakeGeminiLLM(GeminiLLM):
+    """Deterministic replacement for the Gemini call with configurable latency."""
+
+    latency: float = Field(default=0.5)
+    jitter: float = Field(default=0.2)
+
+    def _complete(self, combined_prompt: str) -> str:
+        digest = hashlib.sha1(combined_prompt.encode()).hexdigest()
+        rng = random.Random(digest)
+        time.sleep(max(0.0, self.latency * (1 + rng.uniform(-self.jitter, self.jitter))))
+        return (
+            f"Based on your profile, allocate your monthly surplus according to your risk tolerance. "
+            f"(fake response {digest[:12]}, prompt of {len(combined_prompt)} chars)"
+        )
+
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashing embeddings: cheap, deterministic, and similarity-preserving enough for MMR."""
+
+    def __init__(self, dim: int = 384, latency_per_text: float = 0.0):
+        self.dim = dim
+        self.latency_per_text = latency_per_text
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = zlib.crc32(token.encode())
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_per_text:
+            time.sleep(self.latency_per_text * len(texts))
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_per_text:
+            time.sleep(self.latency_per_text)
+        return self._embed(text)
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    return all(doc.get(key) == value for key, value in query.items())
+
+
+def _apply_update(doc: dict, update: dict):
+    doc.update(copy.deepcopy(update.get("$set", {})))
+    for key, amount in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + amount
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[dict]):
+        self.docs = docs
+
+    def sort(self, key: str, direction: int = 1):
+        self.docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs if length is None else self.docs[:length]
+
+
+class InMemoryCollection:
+    """The subset of the motor collection API used by the backend."""
+
+    def __init__(self, unique_keys=(), latency: float = 0.0):
+        self.docs: List[dict] = []
+        self.unique_keys = unique_keys
+        self.latency = latency
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def find_one(self, query: dict):
+        await self._delay()
+        for doc in self.docs:
+            if _matches(doc, query):
+                # Copy to mimic BSON decoding and keep callers from mutating the store.
+                return copy.deepcopy(doc)
+        return None
+
+    async def create_index(self, keys, **kwargs):
+        # Uniqueness is enforced through unique_keys; nothing to build here.
+        return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+    def find(self, query: dict) -> InMemoryCursor:
+        return InMemoryCursor([copy.deepcopy(d) for d in self.docs if _matches(d, query)])
+
+    async def insert_one(self, document: dict):
+        await self._delay()
+        for key in self.unique_keys:
+            if any(d.get(key) == document.get(key) for d in self.docs):
+                raise DuplicateKeyError(f"duplicate key: {key}")
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, documents: List[dict]):
+        ids = [(await self.insert_one(doc)).inserted_id for doc in documents]
+        return SimpleNamespace(inserted_ids=ids)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        await self._delay()
+        for doc in self.docs:
+            if _matches(doc, query):
+                _apply_update(doc, update)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = dict(query)
+            _apply_update(doc, update)
+            doc.setdefault("_id", ObjectId())
+            self.docs.append(doc)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def find_one_and_update(self, query: dict, update: dict, upsert: bool = False, return_document=None):
+        # Always returns the updated document (ReturnDocument.AFTER), the only mode the backend uses.
+        await self.update_one(query, update, upsert=upsert)
+        return await self.find_one(query)
+
+    async def delete_many(self, query: dict):
+        await self._delay()
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+
+class InMemoryDatabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._collections = {"users": InMemoryCollection(unique_keys=("email",), latency=latency)}
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(latency=self.latency)
+        return self._collections[name]
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return getattr(self, name)
+
+
+def install_fakes(app, llm_latency: float = 0.5, embed_latency: float = 0.0, db_latency: float = 0.0) -> InMemoryDatabase:
+    """Swaps the service's LLM/embeddings and the app's database for local stand-ins."""
+    from db.database import get_database
+
+    llm_gemini_service.llm_gemini = FakeGeminiLLM(
+        model_name="fake-gemini", api_key="fake", latency=llm_latency
+    )
+    llm_gemini_service.embeddings = TimedEmbeddings(HashEmbeddings(latency_per_text=embed_latency))
+    llm_gemini_service.retrieval_chains.clear()
+    llm_gemini_service.chain_versions.clear()
+
+    db = InMemoryDatabase(latency=db_latency)
+    app.dependency_overrides[get_database] = lambda: db
+    return db
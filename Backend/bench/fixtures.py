@@ -0,0 +1,112 @@
+# Backend/bench/fixtures.py
+"""Synthetic stand-ins for the Kaggle datasets and for uploaded bank statements."""
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+# Directory names match the dataset part of the Kaggle handles used by
+# services.llm_gemini_service.fetch_historical_data.
+DATASETS = {
+    "nifty50-stock-market-data": (
+        "NIFTY50_all.csv",
+        ["Date", "Symbol", "Open", "High", "Low", "Close", "Volume"],
+    ),
+    "gold-price-prediction-dataset": (
+        "FINAL_USO.csv",
+        ["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"],
+    ),
+    "mutual-funds-india-detailed": (
+        "comprehensive_mutual_funds_data.csv",
+        ["scheme_name", "category", "risk_level", "fund_size_cr", "returns_1yr", "returns_3yr", "returns_5yr"],
+    ),
+}
+
+NIFTY_SYMBOLS = ["RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK", "ITC", "LT", "SBIN"]
+FUND_CATEGORIES = ["Equity", "Debt", "Hybrid", "Solution Oriented", "Other"]
+
+
+def _row(name: str, i: int, rng: random.Random) -> list:
+    day = (date(2015, 1, 1) + timedelta(days=i)).isoformat()
+    price = round(rng.uniform(100, 5000), 2)
+    if name == "nifty50-stock-market-data":
+        return [day, rng.choice(NIFTY_SYMBOLS), price, round(price * 1.02, 2),
+                round(price * 0.98, 2), round(price * rng.uniform(0.98, 1.02), 2), rng.randint(10**5, 10**7)]
+    if name == "gold-price-prediction-dataset":
+        return [day, price, round(price * 1.01, 2), round(price * 0.99, 2),
+                price, price, rng.randint(10**5, 10**7)]
+    return [f"Fund {i}", rng.choice(FUND_CATEGORIES), rng.randint(1, 6), round(rng.uniform(10, 50000), 1),
+            round(rng.uniform(-5, 40), 1), round(rng.uniform(0, 30), 1), round(rng.uniform(0, 25), 1)]
+
+
+def write_historical_datasets(root: str, rows: int = 2000, seed: int = 0) -> str:
+    """Writes one CSV per dataset under root and returns root (for HISTORICAL_DATA_DIR)."""
+    rng = random.Random(seed)
+    for name, (filename, header) in DATASETS.items():
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+        with open(os.path.join(root, name, filename), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for i in range(rows):
+                writer.writerow(_row(name, i, rng))
+    return root
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def statement_lines(pages: int, lines_per_page: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    balance = 250000.0
+    day = date(2025, 1, 1)
+    result = []
+    for _ in range(pages):
+        page = []
+        for _ in range(lines_per_page):
+            amount = round(rng.uniform(50, 25000), 2)
+            credit = rng.random() < 0.2
+            balance += amount if credit else -amount
+            day += timedelta(hours=rng.randint(1, 30))
+            kind = rng.choice(["UPI", "NEFT", "IMPS", "POS", "ATM"])
+            page.append(
+                f"{day.isoformat()} {kind}/{rng.randint(10**9, 10**10)}/{rng.choice(['SWIGGY', 'AMAZON', 'SALARY', 'RENT', 'ZERODHA', 'ELECTRICITY'])} "
+                f"{'CR' if credit else 'DR'} {amount:.2f} BAL {balance:.2f}"
+            )
+        result.append(page)
+    return result
+
+
+def make_statement_pdf(pages: int = 3, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """Builds a minimal text PDF that PyPDFLoader can extract a bank statement from."""
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+    for lines in statement_lines(pages, lines_per_page, seed):
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 8 Tf 30 810 Td 11 TL\n"
+        stream += "".join(f"({_pdf_escape(line)}) Tj T*\n" for line in lines)
+        stream += "ET"
+        objects[page_id] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in range(1, next_id):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{objects[obj_id]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {next_id}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, next_id):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,360 @@
+# Backend/bench/loadtest.py
+"""
+Offline load test for the FastAPI app in main.py.
+
+Runs the real app under uvicorn with local stand-ins for Gemini, the
+embedding model, Alpha Vantage, Kaggle and MongoDB, drives a mix of
+signup/login/prompt/upload traffic at each concurrency level and reports
+p50/p95/p99 latency and RPS per endpoint.
+
+    cd Backend
+    python -m bench.loadtest --concurrency 1 8 32 --duration 30 --output bench_results.json
+    python -m bench.loadtest --compare bench_results.json   # exit 1 on p95 regression
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from bench.fixtures import make_statement_pdf, write_historical_datasets
+from bench.quote_server import QuoteServer
+
+ENDPOINTS = ("signup", "login", "prompt", "upload")
+PROMPTS = [
+    "How should I split my monthly surplus?",
+    "I want to invest for 5 years, what return can I expect?",
+    "I have 100000 INR and want a 14% return in 6 months.",
+    "Analyse my bank statement and tell me where I overspend.",
+    "Is gold a good hedge compared to NIFTY50 right now?",
+    "Which mutual fund category fits a medium risk profile?",
+]
+
+
+def configure_environment(quote_url: str, data_dir: str, keep_rate_limits: bool):
+    """Must run before anything imports core.config."""
+    for key in ("MONGO_URI", "MONGO_DB_NAME", "HUGGINGFACE_USER_ACCESS_TOKEN", "FINANCE_API_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(key, "mongodb://127.0.0.1:1" if key == "MONGO_URI" else "bench")
+    os.environ["FINANCE_API_URL"] = quote_url
+    os.environ["HISTORICAL_DATA_DIR"] = data_dir
+    os.environ["MODEL_INIT_ON_STARTUP"] = "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not keep_rate_limits:
+        # Per-user buckets would otherwise dominate the results; the global
+        # concurrency caps stay in place because they shape real latency.
+        for key in ("CHAT_RATE_PER_MINUTE", "CHAT_BURST", "UPLOAD_RATE_PER_MINUTE", "UPLOAD_BURST"):
+            os.environ[key] = "1000000"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app_server(app):
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=_free_port(), log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{config.port}"
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile.
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed: float) -> dict:
+    summary = {}
+    for endpoint in ENDPOINTS:
+        rows = samples.get(endpoint, [])
+        ok = sorted(latency for latency, status in rows if 200 <= status < 300)
+        summary[endpoint] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "rejected": sum(1 for _, status in rows if status in (429, 503)),
+            "errors": sum(1 for _, status in rows if status >= 300 and status not in (429, 503)),
+            "rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(ok, 50) * 1000, 1),
+            "p95_ms": round(percentile(ok, 95) * 1000, 1),
+            "p99_ms": round(percentile(ok, 99) * 1000, 1),
+        }
+    return summary
+
+
+def stage_snapshot() -> dict:
+    from core.metrics import STAGE_LATENCY
+
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for metric in STAGE_LATENCY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_sum"):
+                totals[sample.labels["stage"]][0] = sample.value
+            elif sample.name.endswith("_count"):
+                totals[sample.labels["stage"]][1] = sample.value
+    return dict(totals)
+
+
+def stage_means(before: dict, after: dict) -> dict:
+    means = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0.0))
+        if count > prev_count:
+            means[stage] = round((total - prev_total) / (count - prev_count) * 1000, 2)
+    return means
+
+
+class Traffic:
+    def __init__(self, client, args, pdf_bytes: bytes):
+        self.client = client
+        self.args = args
+        self.pdf_bytes = pdf_bytes
+        self.users = []
+        self.signups = 0
+
+    def _new_user(self, rng: random.Random) -> dict:
+        self.signups += 1
+        return {
+            "email": f"bench{self.signups}@example.com",
+            "username": f"bench{self.signups}",
+            "password": "bench-password",
+            "income": rng.choice([40000, 75000, 120000, 250000]),
+            "expenses": rng.choice([20000, 35000, 60000]),
+            "investment_goals": rng.choice(["Retirement", "House down payment", "Wealth creation"]),
+            "risk_tolerance": rng.choice(["low", "medium", "high"]),
+        }
+
+    async def signup(self, rng):
+        user = self._new_user(rng)
+        response = await self.client.post("/api/auth/signup", json=user)
+        if response.status_code == 200:
+            self.users.append(user)
+        return response.status_code
+
+    async def login(self, rng):
+        user = rng.choice(self.users)
+        response = await self.client.post(
+            "/api/auth/login", json={"email": user["email"], "password": user["password"]}
+        )
+        return response.status_code
+
+    async def prompt(self, rng):
+        user = rng.choice(self.users)
+        response = await self.client.post(
+            "/api/chatbot/prompt", json={"email": user["email"], "prompt": rng.choice(PROMPTS)}
+        )
+        return response.status_code
+
+    async def upload(self, rng):
+        user = rng.choice(self.users)
+        response = await self.client.post(
+            "/api/chatbot/upload-pdf",
+            data={"email": user["email"]},
+            files={"file": ("statement.pdf", self.pdf_bytes, "application/pdf")},
+        )
+        return response.status_code
+
+    async def run_level(self, concurrency: int, duration: float, seed: int):
+        samples = defaultdict(list)
+        weights = [self.args.mix[e] for e in ENDPOINTS]
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(f"{seed}-{concurrency}-{worker_id}")
+            while time.perf_counter() < deadline:
+                endpoint = rng.choices(ENDPOINTS, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = await getattr(self, endpoint)(rng)
+                except Exception:
+                    status = 599
+                samples[endpoint].append((time.perf_counter() - start, status))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return samples, time.perf_counter() - start
+
+
+async def run(args, base_url: str) -> dict:
+    import httpx
+
+    pdf_bytes = make_statement_pdf(pages=args.pdf_pages, seed=args.seed)
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        traffic = Traffic(client, args, pdf_bytes)
+        rng = random.Random(args.seed)
+        for _ in range(args.users):
+            await traffic.signup(rng)
+        if not traffic.users:
+            raise SystemExit("Could not seed any users; is the app healthy?")
+
+        results = {}
+        for concurrency in args.concurrency:
+            if args.warmup:
+                await traffic.run_level(concurrency, args.warmup, args.seed + 1)
+            before = stage_snapshot()
+            samples, elapsed = await traffic.run_level(concurrency, args.duration, args.seed)
+            results[str(concurrency)] = {
+                "endpoints": summarize(samples, elapsed),
+                "stage_mean_ms": stage_means(before, stage_snapshot()),
+            }
+            print_level(concurrency, results[str(concurrency)])
+        return results
+
+
+def print_level(concurrency: int, result: dict):
+    print(f"\nconcurrency={concurrency}")
+    print(f"  {'endpoint':<8} {'ok':>6} {'rej':>5} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, s in result["endpoints"].items():
+        print(
+            f"  {endpoint:<8} {s['ok']:>6} {s['rejected']:>5} {s['errors']:>5} {s['rps']:>8} "
+            f"{s['p50_ms']:>7}ms {s['p95_ms']:>7}ms {s['p99_ms']:>7}ms"
+        )
+    stages = ", ".join(f"{k}={v}ms" for k, v in sorted(result["stage_mean_ms"].items()))
+    print(f"  stages: {stages}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _share(stats: dict, key: str) -> float:
+    return stats.get(key, 0) / stats["requests"] if stats.get("requests") else 0.0
+
+
+def compare(baseline: dict, current: dict, max_regression: float, max_share_change: float = 0.05) -> bool:
+    """
+    Prints deltas against a previous run; returns False on any regression:
+    p95 up by more than max_regression, p95 gone although the baseline had
+    one (every request failed), or the ok share falling / error share rising
+    by more than max_share_change.
+    """
+    if baseline["meta"]["settings"] != current["meta"]["settings"]:
+        print("warning: baseline was recorded with different settings; results may not be comparable")
+    ok = True
+    print(
+        f"\nvs baseline {baseline['meta']['commit']} "
+        f"(p95 threshold +{max_regression:.0%}, ok/error share threshold {max_share_change:.0%}):"
+    )
+    for level, base_level in baseline["results"].items():
+        result = current["results"].get(level)
+        if not result:
+            continue
+        for endpoint, base_stats in base_level["endpoints"].items():
+            stats = result["endpoints"].get(endpoint, {})
+            base, cur = base_stats.get("p95_ms"), stats.get("p95_ms")
+            problems = []
+            if base and not cur:
+                problems.append("no successful requests")
+            elif base:
+                change = (cur - base) / base
+                if change > max_regression:
+                    problems.append(f"p95 {change:+.1%}")
+            ok_drop = _share(base_stats, "ok") - _share(stats, "ok")
+            if base_stats.get("requests") and ok_drop > max_share_change:
+                problems.append(f"ok share -{ok_drop:.1%}")
+            error_rise = _share(stats, "errors") - _share(base_stats, "errors")
+            if error_rise > max_share_change:
+                problems.append(f"error share +{error_rise:.1%}")
+            ok = ok and not problems
+            print(
+                f"  c={level:<4} {endpoint:<8} p95 {base or 0:>9}ms -> {cur or 0:>9}ms  "
+                f"ok {_share(base_stats, 'ok'):.0%} -> {_share(stats, 'ok'):.0%}  "
+                f"{'REGRESSION: ' + ', '.join(problems) if problems else ''}"
+            )
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unrecorded seconds before each level")
+    parser.add_argument("--users", type=int, default=20, help="users signed up before measuring")
+    parser.add_argument("--mix", default="signup=1,login=3,prompt=8,upload=1",
+                        help="relative endpoint weights, e.g. prompt=1 for a chat-only run")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.0005, help="seconds per embedded text")
+    parser.add_argument("--quote-latency", type=float, default=0.05)
+    parser.add_argument("--db-latency", type=float, default=0.001)
+    parser.add_argument("--dataset-rows", type=int, default=2000)
+    parser.add_argument("--pdf-pages", type=int, default=3)
+    parser.add_argument("--keep-rate-limits", action="store_true", help="leave per-user token buckets enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 increase")
+    parser.add_argument("--max-share-change", type=float, default=0.05,
+                        help="allowed drop in ok share / rise in error share (absolute)")
+    args = parser.parse_args(argv)
+    mix = dict.fromkeys(ENDPOINTS, 0.0)
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in mix:
+            parser.error(f"unknown endpoint in --mix: {name}")
+        mix[name.strip()] = float(weight)
+    args.mix = mix
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    quotes = QuoteServer(latency=args.quote_latency).start()
+    data_dir = write_historical_datasets(tempfile.mkdtemp(prefix="bench-data-"), rows=args.dataset_rows, seed=args.seed)
+    configure_environment(quotes.url, data_dir, args.keep_rate_limits)
+
+    from main import app
+    from bench.fakes import install_fakes
+
+    install_fakes(app, llm_latency=args.llm_latency, embed_latency=args.embed_latency, db_latency=args.db_latency)
+    server, thread, base_url = start_app_server(app)
+    try:
+        results = asyncio.run(run(args, base_url))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        quotes.stop()
+
+    settings_used = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "max_regression", "max_share_change")}
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "settings": settings_used,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(baseline, report, args.max_regression, args.max_share_change):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
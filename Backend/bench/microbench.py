@@ -0,0 +1,214 @@
+# Backend/bench/microbench.py
+"""
+Microbenchmarks for the retrieval-build and ingestion stages of
+services/llm_gemini_service.py, using the same local stand-ins as the
+load test. Reports median/min wall time over --repeat runs and the peak
+Python heap allocated during one extra traced run (tracemalloc).
+
+    cd Backend
+    python -m bench.microbench --output micro_results.json
+    python -m bench.microbench --only load_user_data mmr_retrieval
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from bench.fixtures import make_statement_pdf, statement_lines, write_historical_datasets
+from bench.loadtest import configure_environment, git_commit
+from bench.quote_server import QuoteServer
+
+EMAIL = "micro@example.com"
+QUERY = "How should I split my monthly surplus between FD, large caps and PPF?"
+
+
+def make_user(turns: int) -> dict:
+    return {
+        "email": EMAIL,
+        "username": "micro",
+        "hashed_password": "x",
+        "income": 120000,
+        "expenses": 45000,
+        "investment_goals": "Wealth creation",
+        "risk_tolerance": "medium",
+        "chat_history": [
+            (f"Question {i}: {QUERY}", f"Answer {i}: put 30% in FD, 25% in mid caps and the rest in large caps and PPF.")
+            for i in range(turns)
+        ],
+    }
+
+
+def statement_docs(count: int):
+    from langchain.docstore.document import Document
+
+    pages = statement_lines(pages=max(1, count // 3), lines_per_page=15)
+    lines = [line for page in pages for line in page]
+    return [
+        Document(page_content="User's Bank Account Statement Data\n" + "\n".join(lines[i::count]))
+        for i in range(count)
+    ]
+
+
+def _drop_index(service):
+    # Chroma.from_documents reuses one in-process collection; drop it so repeated
+    # builds measure a fresh index rather than an ever-growing one.
+    chain = service.retrieval_chains.pop(EMAIL, None)
+    if chain is not None and hasattr(chain.retriever.vectorstore, "delete_collection"):
+        chain.retriever.vectorstore.delete_collection()
+
+
+async def measure(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "min_ms": round(min(times) * 1000, 2),
+        "peak_mib": round(peak / 2**20, 2),
+    }
+
+
+async def bench_load_user_data(service, db, args):
+    results = {}
+    for turns in args.history_turns:
+        db.users.docs = [make_user(turns)]
+        results[f"turns={turns}"] = await measure(lambda: service.load_user_data(db, EMAIL), args.repeat)
+    return results
+
+
+async def bench_build_retrieval_chain(service, db, args):
+    results = {}
+    store = service.get_rag_store(db)
+    db.users.docs = [make_user(10)]
+    for size in args.corpus_sizes:
+        await store.clear(EMAIL)
+        await store.add_pdf_docs(EMAIL, statement_docs(size))
+
+        async def build():
+            _drop_index(service)
+            await service.build_retrieval_chain(db, EMAIL)
+
+        results[f"pdf_docs={size}"] = await measure(build, args.repeat)
+    _drop_index(service)
+    await store.clear(EMAIL)
+    return results
+
+
+async def bench_process_document(service, db, args):
+    results = {}
+    store = service.get_rag_store(db)
+    db.users.docs = [make_user(10)]
+    tmp_dir = tempfile.mkdtemp(prefix="bench-pdf-")
+    for pages in args.statement_pages:
+        path = os.path.join(tmp_dir, f"statement_{pages}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_statement_pdf(pages=pages, seed=args.seed))
+
+        async def ingest():
+            _drop_index(service)
+            await store.clear(EMAIL)
+            await service.process_document(path, db, EMAIL)
+
+        results[f"pages={pages}"] = await measure(ingest, args.repeat)
+    _drop_index(service)
+    await store.clear(EMAIL)
+    return results
+
+
+async def bench_mmr_retrieval(service, db, args):
+    results = {}
+    store = service.get_rag_store(db)
+    db.users.docs = [make_user(100)]
+    await store.clear(EMAIL)
+    await store.add_pdf_docs(EMAIL, statement_docs(max(args.corpus_sizes)))
+    _drop_index(service)
+    await service.build_retrieval_chain(db, EMAIL)
+    vectorstore = service.retrieval_chains[EMAIL].retriever.vectorstore
+    for k in args.k:
+        retriever = vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": k, "lambda_mult": 0.25})
+
+        async def retrieve():
+            retriever.invoke(QUERY)
+
+        results[f"k={k}"] = await measure(retrieve, args.repeat * 5)
+    _drop_index(service)
+    await store.clear(EMAIL)
+    return results
+
+
+BENCHMARKS = {
+    "load_user_data": bench_load_user_data,
+    "build_retrieval_chain": bench_build_retrieval_chain,
+    "process_document": bench_process_document,
+    "mmr_retrieval": bench_mmr_retrieval,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run a subset")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history-turns", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[10, 100, 1000], help="PDF chunks in the index")
+    parser.add_argument("--statement-pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--k", type=int, nargs="+", default=[6, 12])
+    parser.add_argument("--embeddings", choices=["hash", "minilm"], default="hash",
+                        help="hash: fake feature-hashing embeddings; minilm: the real model used in production")
+    parser.add_argument("--vector-store", choices=["numpy", "chroma"], default="numpy",
+                        help="per-user index backend to benchmark (VECTOR_STORE_BACKEND)")
+    parser.add_argument("--dataset-rows", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    from main import app
+    from bench.fakes import install_fakes
+    from services import llm_gemini_service as service
+
+    db = install_fakes(app, llm_latency=0.0)
+    if args.embeddings == "minilm":
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        service.embeddings = service.TimedEmbeddings(HuggingFaceEmbeddings(
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            model_kwargs={"device": service.DEVICE}
+        ))
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = await BENCHMARKS[name](service, db, args)
+        for case, stats in results[name].items():
+            print(f"{name:<22} {case:<16} median {stats['median_ms']:>10}ms  min {stats['min_ms']:>10}ms  peak {stats['peak_mib']:>8} MiB")
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    quotes = QuoteServer(latency=0.0).start()
+    data_dir = write_historical_datasets(tempfile.mkdtemp(prefix="bench-data-"), rows=args.dataset_rows, seed=args.seed)
+    configure_environment(quotes.url, data_dir, keep_rate_limits=True)
+    os.environ["VECTOR_STORE_BACKEND"] = args.vector_store
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        quotes.stop()
+    if args.output:
+        settings_used = {k: v for k, v in vars(args).items() if k != "output"}
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"commit": git_commit(), "settings": settings_used}, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Backend/bench/quote_server.py
+"""Local stand-in for the Alpha Vantage GLOBAL_QUOTE endpoint."""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_quote(symbol: str) -> dict:
+    # Deterministic per symbol so runs are comparable.
+    base = 1000 + zlib.crc32(symbol.encode()) % 20000
+    return {
+        "01. symbol": symbol,
+        "02. open": f"{base:.4f}",
+        "03. high": f"{base * 1.012:.4f}",
+        "04. low": f"{base * 0.991:.4f}",
+        "05. price": f"{base * 1.004:.4f}",
+        "06. volume": str(100000 + base * 7),
+        "07. latest trading day": "2025-03-28",
+        "08. previous close": f"{base * 0.998:.4f}",
+        "09. change": f"{base * 0.006:.4f}",
+        "10. change percent": "0.6000%",
+    }
+
+
+class QuoteServer:
+    def __init__(self, latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                symbol = query.get("symbol", [""])[0]
+                time.sleep(server.latency)
+                body = json.dumps({"Global Quote": fake_quote(symbol)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
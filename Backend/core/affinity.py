@@ -0,0 +1,30 @@
+# Backend/core/affinity.py
+"""
+Optional user-affinity hint for load balancers.
+
+Any worker can serve any user (see services/rag_state.py), but the one that
+last built a user's index can answer without rebuilding it. Login/signup
+return a per-user key in the X-User-Affinity header (exposed via CORS) and
+as a user_affinity cookie. Clients echo the header on later requests (the
+frontend's api.js does), and a load balancer can hash on it, e.g. nginx
+`hash $http_x_user_affinity consistent;`. The cookie only helps when the
+frontend and API are served from the same site; with the default dev setup
+(localhost:5173 calling 127.0.0.1:8000) browsers neither store nor send it.
+"""
+import hashlib
+from fastapi import Response
+
+AFFINITY_COOKIE = "user_affinity"
+AFFINITY_HEADER = "X-User-Affinity"
+AFFINITY_MAX_AGE = 30 * 24 * 3600
+
+
+def affinity_key(email: str) -> str:
+    """Stable, non-reversible key a load balancer can hash on to keep a user on one worker."""
+    return hashlib.sha256(email.encode()).hexdigest()[:16]
+
+
+def set_affinity(response: Response, email: str):
+    key = affinity_key(email)
+    response.set_cookie(AFFINITY_COOKIE, key, max_age=AFFINITY_MAX_AGE, httponly=True, samesite="lax")
+    response.headers[AFFINITY_HEADER] = key
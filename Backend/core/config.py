@@ -1,4 +1,5 @@
 # Backend/core/config.py
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,6 +9,44 @@ class Settings(BaseSettings):
     FINANCE_API_KEY: str
     FINANCE_API_URL: str
     GEMINI_API_KEY: str
+
+    # Password hashing (bcrypt cost and the size of the pool it runs in)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Admission control for the LLM-backed endpoints. The *_MAX_CONCURRENCY
+    # caps are totals for the node and are split across WORKERS, but every
+    # worker gets at least one slot, so with WORKERS > cap the effective total
+    # is WORKERS. The per-user rate buckets and the wait queue are per worker.
+    CHAT_RATE_PER_MINUTE: float = 20
+    CHAT_BURST: int = 5
+    UPLOAD_RATE_PER_MINUTE: float = 4
+    UPLOAD_BURST: int = 2
+    LLM_MAX_CONCURRENCY: int = 4
+    INGEST_MAX_CONCURRENCY: int = 2
+    ADMISSION_MAX_QUEUE: int = 16
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0
+
+    LOG_LEVEL: str = "INFO"
+
+    # Read Kaggle datasets from a local directory instead of downloading them
+    HISTORICAL_DATA_DIR: Optional[str] = None
+    # Set to false to skip loading the LLM/embedding models at app startup
+    # (the benchmark harness and tests install their own stand-ins)
+    MODEL_INIT_ON_STARTUP: bool = True
+
+    # Serving / shared per-user RAG state (see services/rag_state.py)
+    HOST: str = "127.0.0.1"
+    PORT: int = 8000
+    WORKERS: int = 1
+    RAG_STATE_BACKEND: str = "mongo"
+    RAG_STATE_DIR: str = ".rag_state"
+    RAG_CACHE_MAX_USERS: int = 256
+
+    # Per-user vector index: "numpy" (in-process, see services/vector_index.py) or "chroma"
+    VECTOR_STORE_BACKEND: str = "numpy"
+    VECTOR_STORE_DTYPE: str = "float32"
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,64 @@
+# Backend/core/metrics.py
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess,
+)
+
+# With several uvicorn workers, each process has its own registry. When
+# PROMETHEUS_MULTIPROC_DIR is set (main.py does this for WORKERS > 1) the
+# metrics are written there and /metrics aggregates all workers.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Stage names used across the chat pipeline:
+# user_fetch, market_fetch, historical_load, embedding, index_build,
+# retrieval, llm_call, history_write
+# (index_build includes the embedding time of the documents it indexes)
+STAGE_LATENCY = Histogram(
+    "chat_stage_latency_seconds",
+    "Latency of each stage of the chat/ingestion pipeline",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CACHE_LOOKUPS = Counter(
+    "chat_cache_lookups_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+PROMPT_TOKENS = Histogram(
+    "chat_prompt_tokens",
+    "Estimated tokens sent to the LLM per call (characters / 4)",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+IN_FLIGHT = Gauge(
+    "chat_in_flight",
+    "Operations currently in progress",
+    ["operation"],
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def render_metrics():
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
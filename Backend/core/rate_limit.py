@@ -0,0 +1,116 @@
+# Backend/core/rate_limit.py
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from fastapi import HTTPException
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _too_many(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Takes one token. Returns 0 on success, otherwise seconds until one is available."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-key (user email) token buckets."""
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def _prune(self):
+        # Drop buckets that have refilled completely; they carry no state.
+        now = time.monotonic()
+        for key in list(self.buckets):
+            bucket = self.buckets[key]
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.capacity:
+                del self.buckets[key]
+
+    def check(self, key: str):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self._prune()
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        wait = bucket.try_acquire()
+        if wait:
+            raise _too_many("Rate limit exceeded, please slow down", wait)
+
+
+class ConcurrencyLimiter:
+    """Global cap on in-flight work with a bounded, deadline-limited wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            raise _too_many("Server is overloaded, please retry shortly", self.queue_timeout)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise _too_many("Server is overloaded, please retry shortly", self.queue_timeout)
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+
+chat_rate_limiter = RateLimiter(settings.CHAT_RATE_PER_MINUTE, settings.CHAT_BURST)
+upload_rate_limiter = RateLimiter(settings.UPLOAD_RATE_PER_MINUTE, settings.UPLOAD_BURST)
+
+def _per_worker(total: int, name: str) -> int:
+    # Each worker process holds its own semaphore, so divide the node-wide cap
+    # between them (at least one slot each).
+    workers = max(1, settings.WORKERS)
+    if workers > total:
+        logger.warning(
+            "%s=%d is below WORKERS=%d; each worker still gets one slot, so up to %d run at once",
+            name, total, workers, workers,
+        )
+    return max(1, total // workers)
+
+
+llm_limiter = ConcurrencyLimiter(
+    _per_worker(settings.LLM_MAX_CONCURRENCY, "LLM_MAX_CONCURRENCY"), settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT
+)
+ingest_limiter = ConcurrencyLimiter(
+    _per_worker(settings.INGEST_MAX_CONCURRENCY, "INGEST_MAX_CONCURRENCY"), settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT
+)
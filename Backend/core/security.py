@@ -1,10 +1,73 @@
 # Backend/core/security.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from core.config import settings
+
+def make_crypt_context(rounds: int) -> CryptContext:
+    # min/max rounds are pinned to the configured cost so that hashes made with
+    # another cost are reported as needing an update and get rehashed on login.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+pwd_context = make_crypt_context(settings.BCRYPT_ROUNDS)
+
+# Dedicated pool so bcrypt work never competes with the default executor used
+# by the chat pipeline. bcrypt releases the GIL, so threads are enough here.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash"
+)
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+class CredentialServiceBusy(Exception):
+    """Raised when too many hash/verify jobs are already queued."""
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set only if the stored hash should be replaced."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _release(_future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+async def _run_in_hash_pool(func, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise CredentialServiceBusy()
+        _pending += 1
+    # The slot is released when the job itself finishes (or is cancelled before
+    # starting), not when the awaiting request goes away, so the cap tracks the
+    # real bcrypt backlog even if clients disconnect.
+    try:
+        future = _hash_executor.submit(func, *args)
+    except Exception:
+        # e.g. the executor has been shut down; the job never existed.
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
@@ -1,10 +1,35 @@
 # main.py
-from fastapi import FastAPI
+import os
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from api import auth, chatbot, financial, user
+from core.config import settings
+from core.metrics import render_metrics
+from core.affinity import AFFINITY_HEADER
+from db.database import get_database
+from services.rag_state import ensure_indexes
+from services.llm_gemini_service import init_llm
 import uvicorn
 
-app = FastAPI(title="AI-Powered Financial Advisory Chatbot API")
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load here rather than at import so that the uvicorn supervisor,
+    # which imports this module but never serves, doesn't hold a copy.
+    if settings.MODEL_INIT_ON_STARTUP:
+        await asyncio.to_thread(init_llm)
+    await ensure_indexes(get_database())
+    yield
+
+app = FastAPI(title="AI-Powered Financial Advisory Chatbot API", lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -17,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[AFFINITY_HEADER],
 )
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -28,5 +54,16 @@ app.include_router(user.router, prefix="/api/user", tags=["user"])
 async def root():
     return {"message": "Welcome to the AI-Powered Financial Advisory Chatbot API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
-    uvicorn.run(app, port=8000)
\ No newline at end of file
+    # Per-user RAG state is shared through services/rag_state.py, so any
+    # number of workers (and nodes behind a load balancer) can serve a user.
+    if settings.WORKERS > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Workers inherit this and write metrics to a shared directory so
+        # /metrics reports the whole node rather than whichever worker answered.
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+    uvicorn.run("main:app", host=settings.HOST, port=settings.PORT, workers=settings.WORKERS)
\ No newline at end of file
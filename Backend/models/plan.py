@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List
+
+class AssetAllocation(BaseModel):
+    asset: str
+    percent: float
+    monthly_amount: float
+
+class HorizonProjection(BaseModel):
+    years: int
+    invested: float
+    projected_low: float
+    projected_high: float
+
+class FinancialPlan(BaseModel):
+    plan_version: str = ""
+    risk_tolerance: str
+    income: float
+    expenses: float
+    monthly_surplus: float
+    unallocated_monthly: float = 0.0
+    annual_return_low: float
+    annual_return_high: float
+    allocations: List[AssetAllocation]
+    projections: List[HorizonProjection]
@@ -1,26 +1,42 @@
 import os
+import time
+import logging
+import functools
 import torch
 import requests
 import asyncio
 import pandas as pd
+from collections import OrderedDict
 from typing import Optional, List
 from langchain.chains import RetrievalQA
+from langchain.chains.question_answering.stuff_prompt import PROMPT as QA_PROMPT
+from langchain.prompts import PromptTemplate
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import Chroma
 from langchain.llms.base import LLM
+from langchain.embeddings.base import Embeddings
+from langchain.callbacks.base import BaseCallbackHandler
 from dotenv import load_dotenv
 from pydantic import Field
 from core.config import settings
+from core.metrics import STAGE_LATENCY, PROMPT_TOKENS, IN_FLIGHT, timed, record_cache, estimate_tokens
+from services.rag_state import get_rag_store
+from services.vector_index import NumpyVectorStore
+from services.plan_service import get_or_create_plan, format_plan
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")  # Ensure your .env file has GEMINI_API_KEY
 DEVICE = "cuda:0" if torch.cuda.is_available() else "cpu"
 
-# Dictionaries for per-user data:
-pdf_docs_dict = {}      # key: email, value: list of processed PDF documents
-retrieval_chains = {}    # key: email, value: the RetrievalQA chain for that user
-vector_docs = {}         # key: email, value: the combined list of documents used for retrieval
+# Per-worker caches of per-user data. Uploaded PDF chunks live in the shared
+# RAG store (services/rag_state.py); these are rebuilt from it whenever the
+# user's shared version moves past the one a chain was built at.
+retrieval_chains = OrderedDict()  # key: email, value: the RetrievalQA chain for that user (LRU order)
+chain_versions = {}      # key: email, value: RAG store version the cached chain was built from
+_build_locks = {}        # key: email, value: asyncio.Lock serialising rebuilds on this worker
 
 llm_gemini = None
 embeddings = None
@@ -46,6 +62,7 @@ class GeminiLLM(LLM):
             "'I want to invest for 5 years'), analyze historical data from NIFTY50, gold prices, and mutual funds to provide an estimate. "
             "For medium risk, aim for an annual compounded return between 12-15%, for low risk 8-10%, and for high risk 18-21%. "
             "If the user asks about options that are not present in the available data (e.g., company bonds, crypto), respond that you are currently not able to answer that request. \n\n"
+            "The user's data includes a 'Precomputed Investment Plan' with their investable surplus, per-asset amounts and 1-5 year projections; quote those figures directly instead of recalculating them. \n\n"
             "Use the latest market data from Alpha Vantage and historical datasets (loaded from Kaggle) as context. \n\n"
             "If the user is requesting analysis of their bank statement then look for data in 'User's Bank Account Statement Data' from the vector database. \n\n"
             "If the user asks for something irrelevant to financial advisory, such as asking for a cure for cancer, reply that you are a financial advisory chatbot and cannot answer that question. \n\n"
@@ -57,17 +74,23 @@ class GeminiLLM(LLM):
     def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
         # Combine the system prompt and the user prompt.
         combined_prompt = f"{self.system_prompt}\nUser: {prompt}"
-        # Initialize the Gemini client using the provided API key.
-        client = genai.Client(api_key=self.api_key)
+        PROMPT_TOKENS.observe(estimate_tokens(combined_prompt))
         try:
-            response = client.models.generate_content(
-                model=self.model_name,
-                contents=combined_prompt
-            )
-            return response.text
+            with IN_FLIGHT.labels(operation="llm_call").track_inprogress(), timed("llm_call"):
+                return self._complete(combined_prompt)
         except Exception as e:
+            logger.warning("Gemini API call failed: %s", e)
             return f"Error during Gemini API call: {str(e)}"
 
+    def _complete(self, combined_prompt: str) -> str:
+        # Initialize the Gemini client using the provided API key.
+        client = genai.Client(api_key=self.api_key)
+        response = client.models.generate_content(
+            model=self.model_name,
+            contents=combined_prompt
+        )
+        return response.text
+
     @property
     def _llm_type(self) -> str:
         return "gemini_llm"
@@ -81,6 +104,33 @@ class GeminiLLM(LLM):
             "system_prompt": self.system_prompt
         }
 
+class TimedEmbeddings(Embeddings):
+    """Wraps an embeddings model so document embedding time is recorded."""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with timed("embedding"):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+class RetrievalTimingHandler(BaseCallbackHandler):
+    """Records retriever latency for a single chain invocation."""
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            STAGE_LATENCY.labels(stage="retrieval").observe(time.perf_counter() - start)
+
 def init_llm():
     global llm_gemini, embeddings
     os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
@@ -91,10 +141,10 @@ def init_llm():
         temperature=0.1
     )
     os.environ.pop("GEMINI_API_KEY", None)
-    embeddings = HuggingFaceEmbeddings(
+    embeddings = TimedEmbeddings(HuggingFaceEmbeddings(
         model_name="sentence-transformers/all-MiniLM-L6-v2",
         model_kwargs={"device": DEVICE}
-    )
+    ))
 
 def fetch_latest_financial_data() -> str:
     combined_text = "Latest Financial Market Data:\n"
@@ -120,9 +170,7 @@ def fetch_latest_financial_data() -> str:
                 combined_text += f"No data available for {symbol} (status code {response.status_code})\n"
         except Exception as e:
             combined_text += f"Error fetching data for {symbol}: {str(e)}\n"
-    print("==============================================================")
-    print(combined_text)
-    print("==============================================================")
+    logger.debug("Fetched market data (%d chars)", len(combined_text))
     return combined_text if combined_text.strip() else "No financial market data available."
 
 def load_csv_from_dir(path: str) -> str:
@@ -138,39 +186,50 @@ def load_csv_from_dir(path: str) -> str:
         return f"Error loading CSV from {path}: {str(e)}"
     return ""
 
+def dataset_path(handle: str) -> str:
+    """
+    Resolve a Kaggle dataset handle to a local directory. If HISTORICAL_DATA_DIR
+    is set, datasets are read from <HISTORICAL_DATA_DIR>/<dataset name> instead
+    of being downloaded.
+    """
+    if settings.HISTORICAL_DATA_DIR:
+        return os.path.join(settings.HISTORICAL_DATA_DIR, handle.split("/")[-1])
+    import kagglehub
+    return kagglehub.dataset_download(handle)
+
 def fetch_historical_data() -> dict:
     """
     Download and load historical datasets using kagglehub.
     Returns a dictionary with keys for each dataset and their CSV contents as text.
     """
-    import kagglehub
     historical = {}
     try:
-        nifty_path = kagglehub.dataset_download("rohanrao/nifty50-stock-market-data")
+        nifty_path = dataset_path("rohanrao/nifty50-stock-market-data")
         nifty_data = load_csv_from_dir(nifty_path)
         historical["nifty50"] = nifty_data
-        print("Loaded NIFTY50 dataset from:", nifty_path)
+        logger.debug("Loaded NIFTY50 dataset from: %s", nifty_path)
     except Exception as e:
         historical["nifty50"] = f"Error: {str(e)}"
     try:
-        gold_path = kagglehub.dataset_download("sid321axn/gold-price-prediction-dataset")
+        gold_path = dataset_path("sid321axn/gold-price-prediction-dataset")
         gold_data = load_csv_from_dir(gold_path)
         historical["gold"] = gold_data
-        print("Loaded Gold dataset from:", gold_path)
+        logger.debug("Loaded Gold dataset from: %s", gold_path)
     except Exception as e:
         historical["gold"] = f"Error: {str(e)}"
     try:
-        mutual_funds_path = kagglehub.dataset_download("ravibarnawal/mutual-funds-india-detailed")
+        mutual_funds_path = dataset_path("ravibarnawal/mutual-funds-india-detailed")
         mutual_funds_data = load_csv_from_dir(mutual_funds_path)
         historical["mutual_funds"] = mutual_funds_data
-        print("Loaded Mutual Funds dataset from:", mutual_funds_path)
+        logger.debug("Loaded Mutual Funds dataset from: %s", mutual_funds_path)
     except Exception as e:
         historical["mutual_funds"] = f"Error: {str(e)}"
     return historical
 
 async def load_user_data(db, email: str) -> list:
     corpus = []
-    user = await db.users.find_one({"email": email})
+    with timed("user_fetch"):
+        user = await db.users.find_one({"email": email})
     if user:
         text = (
             f"User Data:\n"
@@ -193,39 +252,84 @@ async def load_user_data(db, email: str) -> list:
                     chat_text = str(entry)
                 corpus.append(chat_text)
     # Append the latest market data (with header).
-    market_data = fetch_latest_financial_data()
+    # Network and CSV work is blocking; keep it off the event loop.
+    with timed("market_fetch"):
+        market_data = await asyncio.to_thread(fetch_latest_financial_data)
     corpus.append(market_data)
     # Append historical market data for each category with headers.
-    historical_data = fetch_historical_data()
+    with timed("historical_load"):
+        historical_data = await asyncio.to_thread(fetch_historical_data)
     for key, data in historical_data.items():
         corpus.append(f"Historical Market Data - {key.title()}:\n{data}")
     return corpus
 
-async def build_retrieval_chain(db, email: str):
+def _cache_chain(email: str, chain, version: int):
+    retrieval_chains[email] = chain
+    retrieval_chains.move_to_end(email)
+    chain_versions[email] = version
+    while len(retrieval_chains) > settings.RAG_CACHE_MAX_USERS:
+        evicted, _ = retrieval_chains.popitem(last=False)
+        chain_versions.pop(evicted, None)
+        _build_locks.pop(evicted, None)
+
+def _build_vector_store(docs):
+    # Embeds every document, so this is CPU-heavy and must run in a thread.
+    if settings.VECTOR_STORE_BACKEND == "chroma":
+        return Chroma.from_documents(docs, embedding=embeddings)
+    return NumpyVectorStore.from_documents(
+        docs, embedding=embeddings, dtype=settings.VECTOR_STORE_DTYPE
+    )
+
+async def load_plan_text(db, email: str) -> str:
+    user = await db.users.find_one({"email": email})
+    if not user:
+        return ""
+    return format_plan(await get_or_create_plan(db, user))
+
+def _qa_prompt(plan_text: str) -> PromptTemplate:
+    """
+    The default "stuff" QA prompt with the user's plan in front of the retrieved
+    context, so the figures reach the model on every call instead of depending
+    on MMR picking the right document.
+    """
+    if not plan_text:
+        return QA_PROMPT
+    prefix = plan_text.replace("{", "{{").replace("}", "}}")
+    return PromptTemplate(
+        template=f"{prefix}\n\n{QA_PROMPT.template}",
+        input_variables=QA_PROMPT.input_variables,
+    )
+
+async def build_retrieval_chain(db, email: str, version: Optional[int] = None):
     from langchain.docstore.document import Document
+    store = get_rag_store(db)
+    if version is None:
+        version = await store.version(email)
     docs = await load_user_data(db, email)
+    # Chains are rebuilt when the profile changes (the update endpoint bumps
+    # the RAG version), so the plan baked in here never goes stale.
+    plan_text = await load_plan_text(db, email)
     db_docs = [Document(page_content=txt) for txt in docs]
-    user_pdf_docs = pdf_docs_dict.get(email, [])
+    user_pdf_docs = await store.load_pdf_docs(email)
     combined_docs = db_docs + user_pdf_docs if user_pdf_docs else db_docs
 
-    vector_docs[email] = combined_docs
+    logger.debug("Building index for user %s from %d documents", email, len(combined_docs))
 
-    # Debug print: show all documents being used in the vector store for this user.
-    print(f"Combined documents for user {email}:")
-    for doc in combined_docs:
-        print(doc.page_content)
-
-    db_vector = Chroma.from_documents(combined_docs, embedding=embeddings)
-    retrieval_chains[email] = RetrievalQA.from_chain_type(
+    with timed("index_build"):
+        db_vector = await asyncio.to_thread(_build_vector_store, combined_docs)
+    chain = RetrievalQA.from_chain_type(
         llm=llm_gemini,
         chain_type="stuff",
         retriever=db_vector.as_retriever(
             search_type="mmr", search_kwargs={'k': 12, 'lambda_mult': 0.25}
         ),
+        chain_type_kwargs={"prompt": _qa_prompt(plan_text)},
         return_source_documents=False
     )
+    _cache_chain(email, chain, version)
+    return chain
 
-async def process_document(document_path: str, db, email: str):
+def _load_pdf_chunks(document_path: str) -> list:
     from langchain.document_loaders import PyPDFLoader
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     loader = PyPDFLoader(document_path)
@@ -235,20 +339,47 @@ async def process_document(document_path: str, db, email: str):
     # Prepend header indicating the document type.
     for doc in new_pdf_docs:
         doc.page_content = "User's Bank Account Statement Data\n" + doc.page_content
-    pdf_docs_dict[email] = pdf_docs_dict.get(email, []) + new_pdf_docs
-    await build_retrieval_chain(db, email)
+    return new_pdf_docs
+
+async def process_document(document_path: str, db, email: str):
+    # PDF parsing and splitting are blocking; run them in a thread.
+    new_pdf_docs = await asyncio.to_thread(_load_pdf_chunks, document_path)
+    version = await get_rag_store(db).add_pdf_docs(email, new_pdf_docs)
+    lock = _build_locks.setdefault(email, asyncio.Lock())
+    async with lock:
+        # If our cached chain is exactly one version behind, the only change is
+        # this upload, so embed just the new chunks into the existing index.
+        # Any other gap means another worker changed the store; rebuild.
+        if email in retrieval_chains and chain_versions.get(email) == version - 1:
+            vectorstore = retrieval_chains[email].retriever.vectorstore
+            with timed("index_append"):
+                await asyncio.to_thread(vectorstore.add_documents, new_pdf_docs)
+            _cache_chain(email, retrieval_chains[email], version)
+        else:
+            await build_retrieval_chain(db, email, version)
+
+async def get_retrieval_chain(db, email: str):
+    """Returns this worker's chain for the user, rebuilding it if another worker changed their documents."""
+    version = await get_rag_store(db).version(email)
+    cached = email in retrieval_chains and chain_versions.get(email) == version
+    record_cache("retrieval_chain", cached)
+    if cached:
+        retrieval_chains.move_to_end(email)
+        return retrieval_chains[email]
+    lock = _build_locks.setdefault(email, asyncio.Lock())
+    async with lock:
+        # Another request on this worker may have rebuilt it while we waited.
+        if email in retrieval_chains and chain_versions.get(email) == version:
+            return retrieval_chains[email]
+        return await build_retrieval_chain(db, email, version)
 
 async def process_prompt(db, prompt: str, email: str) -> str:
-    if email not in retrieval_chains:
-        await build_retrieval_chain(db, email)
-    if email in vector_docs:
-        print(f"Using vector database documents for user {email}:")
-        for doc in vector_docs[email]:
-            print(doc.page_content)
+    chain = await get_retrieval_chain(db, email)
     loop = asyncio.get_running_loop()
-    output = await loop.run_in_executor(None, retrieval_chains[email], {"query": prompt})
+    run_chain = functools.partial(
+        chain, {"query": prompt}, callbacks=[RetrievalTimingHandler()]
+    )
+    output = await loop.run_in_executor(None, run_chain)
     answer = output.get("result", "")
     return answer
 
-# Initialize the Gemini LLM and embeddings.
-init_llm()
@@ -0,0 +1,143 @@
+# Backend/services/plan_service.py
+"""
+Materialised per-user investment plan.
+
+The plan depends only on income, expenses and risk tolerance, so it is
+computed when those change (signup, profile update) and stored on the user
+document as `plan`. Prompts and the dashboard read the stored figures
+instead of having the LLM redo the arithmetic on every request.
+
+Each stored plan carries `plan_version`, a hash of the tables below, so a
+plan computed under an older table is recomputed the next time it is read.
+"""
+import hashlib
+import json
+from typing import Optional
+from models.plan import AssetAllocation, FinancialPlan, HorizonProjection
+
+PLAN_INPUT_FIELDS = ("income", "expenses", "risk_tolerance")
+MAX_HORIZON_YEARS = 5
+
+# Kept in step with the allocation table in GeminiLLM.system_prompt, row for
+# row. The low-risk row there only adds up to 50% (and lists PPF twice, once
+# at 0%); compute_plan merges repeated assets and drops 0% rows, and the rest
+# of that surplus is reported as unallocated until the table is settled.
+ALLOCATIONS = {
+    "low": [("PPF", 0), ("National Pension Scheme", 10), ("Government Bonds", 15), ("PPF", 25)],
+    "medium": [("FD", 30), ("Mid Cap", 25), ("Large Cap", 20), ("Small Cap", 15), ("PPF", 10)],
+    "high": [("FD", 15), ("Mid Cap", 25), ("Large Cap", 10), ("Small Cap", 40), ("PPF", 10)],
+}
+# Annual compounded return targets (low, high) per risk level.
+RETURN_RANGES = {
+    "low": (0.08, 0.10),
+    "medium": (0.12, 0.15),
+    "high": (0.18, 0.21),
+}
+# Bump when compute_plan changes how the tables are applied; table edits are
+# picked up by the hash on their own.
+PLAN_FORMULA_REVISION = 2
+PLAN_VERSION = hashlib.sha256(
+    json.dumps([PLAN_FORMULA_REVISION, ALLOCATIONS, RETURN_RANGES], sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+def normalise_risk(risk_tolerance: Optional[str]) -> str:
+    risk = (risk_tolerance or "medium").strip().lower()
+    return risk if risk in ALLOCATIONS else "medium"
+
+
+def _future_value(monthly: float, annual_rate: float, months: int) -> float:
+    # Monthly contributions at the end of each month, compounded monthly at
+    # the rate equivalent to the annual compounded return.
+    rate = (1 + annual_rate) ** (1 / 12) - 1
+    return monthly * (((1 + rate) ** months - 1) / rate)
+
+
+def _merged_allocations(risk: str) -> list:
+    # Sum repeated assets in first-seen order and skip 0% rows.
+    merged = {}
+    for asset, percent in ALLOCATIONS[risk]:
+        merged[asset] = merged.get(asset, 0) + percent
+    return [(asset, percent) for asset, percent in merged.items() if percent > 0]
+
+
+def compute_plan(income: float, expenses: float, risk_tolerance: Optional[str]) -> FinancialPlan:
+    risk = normalise_risk(risk_tolerance)
+    surplus = max(0.0, float(income or 0) - float(expenses or 0))
+    low, high = RETURN_RANGES[risk]
+    rows = _merged_allocations(risk)
+    allocations = [
+        AssetAllocation(asset=asset, percent=percent, monthly_amount=round(surplus * percent / 100, 2))
+        for asset, percent in rows
+    ]
+    allocated = surplus * sum(percent for _, percent in rows) / 100
+    projections = [
+        HorizonProjection(
+            years=years,
+            invested=round(allocated * 12 * years, 2),
+            projected_low=round(_future_value(allocated, low, 12 * years), 2),
+            projected_high=round(_future_value(allocated, high, 12 * years), 2),
+        )
+        for years in range(1, MAX_HORIZON_YEARS + 1)
+    ]
+    return FinancialPlan(
+        plan_version=PLAN_VERSION,
+        risk_tolerance=risk,
+        income=float(income or 0),
+        expenses=float(expenses or 0),
+        monthly_surplus=round(surplus, 2),
+        unallocated_monthly=round(surplus - allocated, 2),
+        annual_return_low=low,
+        annual_return_high=high,
+        allocations=allocations,
+        projections=projections,
+    )
+
+
+def plan_for_user(user_data: dict) -> dict:
+    """Plan document for a user record, ready to be stored under `plan`."""
+    return compute_plan(
+        user_data.get("income", 0),
+        user_data.get("expenses", 0),
+        user_data.get("risk_tolerance", "medium"),
+    ).model_dump()
+
+
+async def get_or_create_plan(db, user_data: dict) -> dict:
+    """
+    Returns the stored plan, recomputing it when it is missing or was built
+    from an older version of the allocation and return tables.
+    """
+    plan = user_data.get("plan")
+    if plan is None or plan.get("plan_version") != PLAN_VERSION:
+        plan = plan_for_user(user_data)
+        await db.users.update_one({"email": user_data["email"]}, {"$set": {"plan": plan}})
+    return plan
+
+
+def format_plan(plan: dict) -> str:
+    lines = [
+        "Precomputed Investment Plan (exact figures, use them as given):",
+        f"Risk Tolerance: {plan['risk_tolerance']}",
+        f"Monthly Investable Surplus: {plan['monthly_surplus']:,.2f} INR "
+        f"(income {plan['income']:,.2f} - expenses {plan['expenses']:,.2f})",
+        "Monthly Allocation:",
+    ]
+    for allocation in plan["allocations"]:
+        lines.append(f"- {allocation['asset']}: {allocation['percent']:g}% = {allocation['monthly_amount']:,.2f} INR")
+    if plan.get("unallocated_monthly"):
+        allocated_percent = sum(allocation["percent"] for allocation in plan["allocations"])
+        lines.append(
+            f"- Unallocated: {plan['unallocated_monthly']:,.2f} INR "
+            f"(the {plan['risk_tolerance']}-risk allocation covers only {allocated_percent:g}% of the surplus)"
+        )
+    lines.append(
+        f"Expected Annual Return: {plan['annual_return_low']:.0%}-{plan['annual_return_high']:.0%} compounded"
+    )
+    lines.append("Projected Value if the allocated amount is invested every month:")
+    for projection in plan["projections"]:
+        lines.append(
+            f"- {projection['years']} year(s): invested {projection['invested']:,.2f} INR, "
+            f"projected {projection['projected_low']:,.2f} - {projection['projected_high']:,.2f} INR"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+# Backend/services/rag_state.py
+"""
+Shared per-user RAG state.
+
+Uploaded statement chunks and a per-user version counter live outside the
+worker process so every worker (and node) sees the same data. Workers keep
+their own cache of built retrieval chains and compare the cached version
+with the shared one to find out when another worker has changed a user's
+documents.
+
+Backends (RAG_STATE_BACKEND):
+  mongo - collections `pdf_chunks` and `rag_state` in the app database;
+          works across nodes.
+  file  - JSON files under RAG_STATE_DIR guarded by fcntl locks; works
+          across workers on one node (or on a shared FS with flock support).
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+from typing import List
+from langchain.docstore.document import Document
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from core.config import settings
+
+
+def _to_record(doc: Document) -> dict:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+
+def _from_record(record: dict) -> Document:
+    return Document(page_content=record["page_content"], metadata=record.get("metadata", {}))
+
+
+class MongoRagStore:
+    def __init__(self, db):
+        self.chunks = db.pdf_chunks
+        self.state = db.rag_state
+
+    async def ensure_indexes(self):
+        # One state document per user; without the unique index two workers
+        # racing on a first upsert can create duplicates and split the version.
+        await self.state.create_index([("email", ASCENDING)], unique=True)
+        await self.chunks.create_index([("email", ASCENDING), ("_id", ASCENDING)])
+
+    async def version(self, email: str) -> int:
+        state = await self.state.find_one({"email": email})
+        return state["version"] if state else 0
+
+    async def load_pdf_docs(self, email: str) -> List[Document]:
+        cursor = self.chunks.find({"email": email}).sort("_id", 1)
+        return [_from_record(record) for record in await cursor.to_list(length=None)]
+
+    async def add_pdf_docs(self, email: str, docs: List[Document]) -> int:
+        if docs:
+            await self.chunks.insert_many([{"email": email, **_to_record(doc)} for doc in docs])
+        return await self._bump(email)
+
+    async def clear(self, email: str) -> int:
+        await self.chunks.delete_many({"email": email})
+        return await self._bump(email)
+
+    async def invalidate(self, email: str) -> int:
+        """Forces every worker to rebuild the user's chain, e.g. after a profile change."""
+        return await self._bump(email)
+
+    async def _bump(self, email: str) -> int:
+        # Chunks are written before the version moves, so a reader that sees the
+        # new version always sees the new chunks.
+        for attempt in range(2):
+            try:
+                state = await self.state.find_one_and_update(
+                    {"email": email},
+                    {"$inc": {"version": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return state["version"]
+            except DuplicateKeyError:
+                # Lost a concurrent first upsert; the document exists now, so retry as an update.
+                if attempt:
+                    raise
+
+
+class FileRagStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, email: str):
+        base = os.path.join(self.root, hashlib.sha256(email.encode()).hexdigest())
+        return base + ".lock", base + ".version", base + ".jsonl"
+
+    def _locked(self, email: str, mode: int):
+        lock_path = self._paths(email)[0]
+        lock_file = open(lock_path, "a")
+        fcntl.flock(lock_file, mode)
+        return lock_file
+
+    def _read_version(self, email: str) -> int:
+        try:
+            with open(self._paths(email)[1]) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_version(self, email: str, version: int):
+        path = self._paths(email)[1]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(version))
+        os.replace(tmp, path)
+
+    def _load(self, email: str) -> List[Document]:
+        lock_file = self._locked(email, fcntl.LOCK_SH)
+        try:
+            with open(self._paths(email)[2]) as f:
+                return [_from_record(json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+        finally:
+            lock_file.close()
+
+    def _append(self, email: str, docs: List[Document], truncate: bool = False) -> int:
+        lock_file = self._locked(email, fcntl.LOCK_EX)
+        try:
+            with open(self._paths(email)[2], "w" if truncate else "a") as f:
+                for doc in docs:
+                    f.write(json.dumps(_to_record(doc)) + "\n")
+            version = self._read_version(email) + 1
+            self._write_version(email, version)
+            return version
+        finally:
+            lock_file.close()
+
+    async def version(self, email: str) -> int:
+        # The version file is replaced atomically, so it can be read without the lock.
+        return await asyncio.to_thread(self._read_version, email)
+
+    async def load_pdf_docs(self, email: str) -> List[Document]:
+        return await asyncio.to_thread(self._load, email)
+
+    async def add_pdf_docs(self, email: str, docs: List[Document]) -> int:
+        return await asyncio.to_thread(self._append, email, docs)
+
+    async def clear(self, email: str) -> int:
+        return await asyncio.to_thread(self._append, email, [], True)
+
+    async def invalidate(self, email: str) -> int:
+        return await asyncio.to_thread(self._append, email, [])
+
+
+_file_store = None
+
+async def ensure_indexes(db):
+    """Creates the indexes the Mongo backend relies on; called at app startup."""
+    if settings.RAG_STATE_BACKEND != "file":
+        await MongoRagStore(db).ensure_indexes()
+
+def get_rag_store(db):
+    global _file_store
+    if settings.RAG_STATE_BACKEND == "file":
+        if _file_store is None:
+            _file_store = FileRagStore(settings.RAG_STATE_DIR)
+        return _file_store
+    return MongoRagStore(db)
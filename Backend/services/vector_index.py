@@ -0,0 +1,177 @@
+# Backend/services/vector_index.py
+"""
+Small in-process vector store backed by a contiguous NumPy matrix.
+
+Per-user collections here are tiny (a profile, some chat turns, market data
+and a few statement chunks), so exact search over a normalised float matrix
+is both faster and far lighter than a Chroma client + collection per user.
+It implements the parts of the LangChain VectorStore interface that
+`as_retriever(search_type="mmr", ...)` relies on.
+"""
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Maximal marginal relevance over unit vectors, equivalent to
+    langchain's maximal_marginal_relevance but with the redundancy term
+    updated incrementally instead of recomputed every round.
+    """
+    n = candidates.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+    to_query = candidates @ query
+    first = int(np.argmax(to_query))
+    selected = [first]
+    max_to_selected = candidates @ candidates[first]
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+    while len(selected) < k:
+        scores = lambda_mult * to_query - (1 - lambda_mult) * max_to_selected
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_to_selected, candidates @ candidates[best], out=max_to_selected)
+    return selected
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(self, embedding: Embeddings, dtype: str = "float32"):
+        self._embedding = embedding
+        self._dtype = np.dtype(dtype)
+        self._vectors: Optional[np.ndarray] = None
+        self._size = 0
+        self._docs: List[Document] = []
+        self._ids: List[str] = []
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[:self._size].astype(np.float32, copy=False)
+
+    def _append_vectors(self, vectors: np.ndarray):
+        needed = self._size + len(vectors)
+        if self._vectors is None:
+            self._vectors = np.empty((needed, vectors.shape[1]), dtype=self._dtype)
+        elif needed > self._vectors.shape[0]:
+            # Grow geometrically so repeated small appends stay amortised O(1).
+            grown = np.empty((max(needed, 2 * self._vectors.shape[0]), self._vectors.shape[1]), dtype=self._dtype)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [doc_id or str(uuid.uuid4()) for doc_id in (ids or [None] * len(texts))]
+        vectors = _normalise(np.asarray(self._embedding.embed_documents(texts), dtype=np.float32))
+        self._append_vectors(vectors)
+        for text, metadata, doc_id in zip(texts, metadatas, ids):
+            self._docs.append(Document(page_content=text, metadata=metadata or {}, id=doc_id))
+        self._ids.extend(ids)
+        return ids
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        return _normalise(np.asarray(self._embedding.embed_query(query), dtype=np.float32))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        if not self._size:
+            return []
+        query = _normalise(np.asarray(embedding, dtype=np.float32))
+        scores = self._matrix() @ query
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._docs[i], float(scores[i])) for i in top]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._query_vector(query).tolist(), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]; map them onto [0, 1].
+        return lambda score: (score + 1) / 2
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        if not self._size:
+            return []
+        # Same two steps as the Chroma path: take the fetch_k nearest, then run MMR over them.
+        query = _normalise(np.asarray(embedding, dtype=np.float32))
+        matrix = self._matrix()
+        scores = matrix @ query
+        fetch_k = min(fetch_k, self._size)
+        candidates = np.argpartition(-scores, fetch_k - 1)[:fetch_k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        chosen = mmr_select(query, matrix[candidates], k, lambda_mult)
+        return [self._docs[candidates[i]] for i in chosen]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._query_vector(query).tolist(), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult
+        )
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        wanted = set(ids)
+        return [doc for doc in self._docs if doc.id in wanted]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, dtype=dtype)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
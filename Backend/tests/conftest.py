@@ -0,0 +1,11 @@
+# Backend/tests/conftest.py
+import os
+import sys
+
+# core.config requires these; the tests never talk to the real services.
+for key in ("MONGO_URI", "MONGO_DB_NAME", "HUGGINGFACE_USER_ACCESS_TOKEN", "FINANCE_API_KEY", "FINANCE_API_URL", "GEMINI_API_KEY"):
+    os.environ.setdefault(key, "mongodb://127.0.0.1:1" if key == "MONGO_URI" else "test")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("MODEL_INIT_ON_STARTUP", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,22 @@
+# Backend/tests/test_chatbot.py
+from fastapi.testclient import TestClient
+from bench.fakes import install_fakes
+from bench.fixtures import make_statement_pdf
+from core.rate_limit import upload_rate_limiter
+from main import app
+
+
+def test_upload_from_unknown_email_is_rejected_before_ingestion():
+    db = install_fakes(app, llm_latency=0.0)
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/chatbot/upload-pdf",
+            data={"email": "nobody@example.com"},
+            files={"file": ("statement.pdf", make_statement_pdf(pages=1), "application/pdf")},
+        )
+        assert response.status_code == 401
+        assert db.pdf_chunks.docs == []
+        assert "nobody@example.com" not in upload_rate_limiter.buckets
+    finally:
+        app.dependency_overrides.clear()
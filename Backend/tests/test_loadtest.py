@@ -0,0 +1,36 @@
+# Backend/tests/test_loadtest.py
+from bench.loadtest import compare
+
+
+def _report(**endpoints):
+    return {"meta": {"commit": "abc", "settings": {}}, "results": {"4": {"endpoints": endpoints}}}
+
+
+def _stats(requests=100, ok=100, errors=0, rejected=0, p95_ms=100.0):
+    return {"requests": requests, "ok": ok, "errors": errors, "rejected": rejected, "p95_ms": p95_ms}
+
+
+def test_unchanged_run_passes():
+    assert compare(_report(prompt=_stats()), _report(prompt=_stats(p95_ms=110.0)), 0.2)
+
+
+def test_p95_regression_fails():
+    assert not compare(_report(prompt=_stats()), _report(prompt=_stats(p95_ms=130.0)), 0.2)
+
+
+def test_endpoint_failing_every_request_fails():
+    baseline = _report(prompt=_stats())
+    current = _report(prompt=_stats(ok=0, errors=100, p95_ms=0.0))
+    assert not compare(baseline, current, 0.2)
+
+
+def test_rejections_replacing_successes_fail():
+    baseline = _report(prompt=_stats())
+    current = _report(prompt=_stats(ok=80, rejected=20, p95_ms=90.0))
+    assert not compare(baseline, current, 0.2)
+
+
+def test_rising_error_share_fails():
+    baseline = _report(prompt=_stats())
+    current = _report(prompt=_stats(requests=200, ok=180, errors=20, p95_ms=100.0))
+    assert not compare(baseline, current, 0.2)
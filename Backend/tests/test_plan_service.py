@@ -0,0 +1,39 @@
+# Backend/tests/test_plan_service.py
+import asyncio
+
+from bench.fakes import InMemoryDatabase
+from services.plan_service import PLAN_VERSION, compute_plan, format_plan, get_or_create_plan, plan_for_user
+
+
+def test_low_risk_merges_repeated_assets_and_drops_zero_rows():
+    plan = compute_plan(100000, 60000, "low")
+    assets = [allocation.asset for allocation in plan.allocations]
+    assert assets == ["PPF", "National Pension Scheme", "Government Bonds"]
+    assert plan.allocations[0].percent == 25
+    assert plan.unallocated_monthly == 20000
+    assert plan.projections[0].invested == 20000 * 12
+    assert "PPF: 0%" not in format_plan(plan.model_dump())
+
+
+def test_medium_risk_allocates_the_whole_surplus():
+    plan = compute_plan(100000, 60000, "Medium")
+    assert sum(allocation.monthly_amount for allocation in plan.allocations) == 40000
+    assert plan.unallocated_monthly == 0
+    assert plan.plan_version == PLAN_VERSION
+
+
+def test_stale_plan_is_recomputed():
+    db = InMemoryDatabase()
+    user = {"email": "a@example.com", "income": 100000, "expenses": 60000, "risk_tolerance": "low"}
+    stale = plan_for_user(user)
+    stale["plan_version"] = "old"
+    stale["allocations"].insert(0, {"asset": "PPF", "percent": 0, "monthly_amount": 0})
+    user["plan"] = stale
+    asyncio.run(db.users.insert_one(dict(user)))
+
+    plan = asyncio.run(get_or_create_plan(db, user))
+
+    assert plan["plan_version"] == PLAN_VERSION
+    assert plan["allocations"][0]["percent"] == 25
+    stored = asyncio.run(db.users.find_one({"email": user["email"]}))
+    assert stored["plan"]["plan_version"] == PLAN_VERSION
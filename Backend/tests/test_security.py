@@ -0,0 +1,50 @@
+# Backend/tests/test_security.py
+import asyncio
+import threading
+import pytest
+from core import security
+
+
+def test_hash_pool_rejects_when_backlog_is_full(monkeypatch):
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(security._run_in_hash_pool(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(security.CredentialServiceBusy):
+            await security.hash_password_async("secret")
+        release.set()
+        assert await first is True
+        # The slot is free again once the job has finished.
+        assert security.pwd_context.verify("secret", await security.hash_password_async("secret"))
+
+    asyncio.run(scenario())
+    assert security._pending == 0
+
+
+def test_slot_is_released_when_submit_fails(monkeypatch):
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(security._hash_executor, "submit", broken_submit)
+    with pytest.raises(RuntimeError):
+        asyncio.run(security.hash_password_async("secret"))
+    assert security._pending == 0
+
+
+def test_login_rehashes_when_bcrypt_cost_changes(monkeypatch):
+    old_hash = security.make_crypt_context(4).hash("secret")
+    monkeypatch.setattr(security, "pwd_context", security.make_crypt_context(5))
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password_async("secret", old_hash))
+    assert valid
+    assert new_hash is not None and new_hash.startswith("$2b$05$")
+
+    valid, again = asyncio.run(security.verify_and_update_password_async("secret", new_hash))
+    assert valid and again is None
+
+
+def test_wrong_password_is_not_rehashed():
+    stored = security.make_crypt_context(4).hash("secret")
+    assert asyncio.run(security.verify_and_update_password_async("wrong", stored)) == (False, None)
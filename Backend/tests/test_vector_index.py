@@ -0,0 +1,21 @@
+# Backend/tests/test_vector_index.py
+import numpy as np
+import pytest
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+from services.vector_index import mmr_select
+
+
+def _unit(rows, dim, rng):
+    vectors = rng.standard_normal((rows, dim))
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+@pytest.mark.parametrize("k", [6, 12])
+@pytest.mark.parametrize("seed", range(5))
+def test_mmr_select_matches_langchain(k, seed):
+    rng = np.random.default_rng(seed)
+    query = _unit(1, 384, rng)[0]
+    candidates = _unit(20, 384, rng)
+    expected = maximal_marginal_relevance(query, list(candidates), lambda_mult=0.25, k=k)
+    assert mmr_select(query, candidates, k=k, lambda_mult=0.25) == expected
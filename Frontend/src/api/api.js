@@ -1,6 +1,21 @@
 // /src/api/api.js
 
 const API_BASE_URL = 'http://127.0.0.1:8000/api';
+const AFFINITY_HEADER = 'X-User-Affinity';
+
+// The backend returns a per-user routing key at login/signup; sending it back
+// lets a load balancer keep this user on the worker that has their index.
+function rememberAffinity(response) {
+    const key = response.headers.get(AFFINITY_HEADER);
+    if (key) {
+        localStorage.setItem('userAffinity', key);
+    }
+}
+
+function affinityHeaders() {
+    const key = localStorage.getItem('userAffinity');
+    return key ? { [AFFINITY_HEADER]: key } : {};
+}
 
 export async function loginUser({ email, password }) {
     const response = await fetch(`${API_BASE_URL}/auth/login`, {
@@ -13,6 +28,7 @@ export async function loginUser({ email, password }) {
     if (!response.ok) {
         throw new Error('Login failed');
     }
+    rememberAffinity(response);
     const data = await response.json();
     return data;
 }
@@ -28,6 +44,7 @@ export async function signupUser({ email, username, password, income, expenses,
     if (!response.ok) {
         throw new Error('Signup failed');
     }
+    rememberAffinity(response);
     return response.json();
 }
 
@@ -35,7 +52,8 @@ export async function getChatbotResponse(email, prompt) {
     const response = await fetch(`${API_BASE_URL}/chatbot/prompt`, {
         method: 'POST',
         headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            ...affinityHeaders(),
         },
         body: JSON.stringify({ email, prompt }),
     });
@@ -54,6 +72,7 @@ export async function uploadPdf(file, email, token) {
         method: 'POST',
         headers: {
             Authorization: `Bearer ${token}`,
+            ...affinityHeaders(),
         },
         body: formData,
     });